@@ -5,9 +5,32 @@ Uses the scoring logic from rubric_scoring.py
 Also updates dimension field names to new naming convention
 """
 
+import argparse
 import json
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+logger = logging.getLogger(__name__)
+
+# Comparison data inside pool worker processes, set by _init_worker
+_worker_data = None
 
 # Dimension name mapping
 DIMENSION_MAPPING = {
@@ -18,6 +41,48 @@ DIMENSION_MAPPING = {
     "harmlessness": "harmless outcome"
 }
 
+# Model sections that carry rubrics, with the label used in progress output
+SCORED_SECTIONS = (
+    ("thinking_trace", "Thinking trace"),
+    ("model_resp", "Model response"),
+)
+
+# Verdict flags returned by _verdict; free-text judgements may carry both
+_YES = 1
+_NO = 2
+
+# Judgement tokens the rubric grader normally emits
+_VERDICT_TOKENS = {
+    "yes": _YES, "Yes": _YES, "YES": _YES, "yes.": _YES, "Yes.": _YES,
+    "no": _NO, "No": _NO, "NO": _NO, "no.": _NO, "No.": _NO,
+}
+
+# Case-insensitive scanners for free-text judgements. No non-ASCII character
+# lowercases to a string containing y, e, s, n or o, so for "yes" and "no"
+# ASCII-only case folding finds exactly what str.lower() would
+_search_yes = re.compile("yes", re.IGNORECASE | re.ASCII).search
+_search_no = re.compile("no", re.IGNORECASE | re.ASCII).search
+
+
+@lru_cache(maxsize=1024)
+def _scan_verdict(judgement):
+    """
+    Scan a free-text judgement for "yes" and/or "no" without building a lowercased copy.
+    Cached, since refusals and other boilerplate judgements repeat across models.
+    """
+    return (_YES if _search_yes(judgement) else 0) | (_NO if _search_no(judgement) else 0)
+
+
+def _verdict(judgement):
+    """
+    Classify a judgement as containing "yes" and/or "no" (case-insensitive).
+    Known tokens are a single dict lookup; anything else goes through _scan_verdict.
+    """
+    verdict = _VERDICT_TOKENS.get(judgement)
+    if verdict is None:
+        verdict = _scan_verdict(judgement)
+    return verdict
+
 
 def calculate_score_for_a_task(criteria):
     """
@@ -26,108 +91,449 @@ def calculate_score_for_a_task(criteria):
     """
     max_score = 0
     achieved_score = 0
+    verdict = _verdict
 
     for criterion in criteria:
-        weight = criterion.get("weight")
+        weight = criterion["weight"]
 
-        # our way 
-        max_score += abs(weight)
-        # only award credit in these cases
-        if "yes" in criterion["judgement"].strip().lower() and weight > 0:
-            achieved_score += weight
-        elif "no" in criterion["judgement"].strip().lower() and weight < 0:
-            achieved_score -= weight
+        # our way: max_score is the sum of abs(weight),
+        # and credit is only awarded in these cases
+        if weight > 0:
+            max_score += weight
+            if verdict(criterion["judgement"]) & _YES:
+                achieved_score += weight
+        elif weight < 0:
+            max_score -= weight
+            if verdict(criterion["judgement"]) & _NO:
+                achieved_score -= weight
 
     return max(min(100 * achieved_score / max_score, 100), 0)
 
 
+def _dimension_renames(rubrics):
+    """
+    Find the rubrics whose dimension name is in the mapping, without changing them.
+    Returns a list of (rubric index, new dimension name).
+    """
+    map_dimension = DIMENSION_MAPPING.get
+    renames = []
+    for rubric_idx, rubric in enumerate(rubrics):
+        new_dimension = map_dimension(rubric.get('dimension'))
+        if new_dimension is not None:
+            renames.append((rubric_idx, new_dimension))
+    return renames
+
+
+def _apply_dimension_renames(rubrics, renames):
+    """
+    Apply renames from _dimension_renames to rubrics, in place.
+    """
+    for rubric_idx, new_dimension in renames:
+        rubrics[rubric_idx]['dimension'] = new_dimension
+
+
 def update_dimension_names(rubrics):
     """
     Update dimension field names in rubrics according to the mapping.
     Returns the count of dimensions updated.
     """
-    updated_count = 0
-    for rubric in rubrics:
-        if 'dimension' in rubric:
-            old_dimension = rubric['dimension']
-            if old_dimension in DIMENSION_MAPPING:
-                rubric['dimension'] = DIMENSION_MAPPING[old_dimension]
-                updated_count += 1
-    return updated_count
+    renames = _dimension_renames(rubrics)
+    _apply_dimension_renames(rubrics, renames)
+    return len(renames)
+
+
+def load_comparison_data(json_file_path):
+    """
+    Load comparison data from disk.
+    Uses orjson when it is installed, parsing straight from a read-only memory
+    map of the file, falling back to the stdlib json module.
+    """
+    if orjson is not None:
+        with open(json_file_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            return orjson.loads(view)
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def encode_comparison_data(data, compact=False, trailing_newline=True):
+    """
+    Encode comparison data as 2-space indented UTF-8 JSON bytes, or with no
+    whitespace at all when compact is set, ending in a newline unless
+    trailing_newline is false.
+    The orjson and stdlib json paths produce equivalent JSON, byte-identical for
+    finite floats without exponents. Beyond that orjson spells exponents differently
+    (1e16, not 1e+16), writes NaN/Infinity as null, and rejects integers wider than 64 bits.
+    """
+    if orjson is not None:
+        option = 0 if compact else orjson.OPT_INDENT_2
+        if trailing_newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(data, option=option)
+    if compact:
+        text = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    else:
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+    if trailing_newline:
+        text += '\n'
+    return text.encode('utf-8')
+
+
+def save_comparison_data(data, json_file_path, compact=False):
+    """
+    Write comparison data back to disk as UTF-8 JSON (see encode_comparison_data).
+    The encoded bytes go straight to the file descriptor, normally in one write(2).
+    """
+    payload = memoryview(encode_comparison_data(data, compact=compact))
+    fd = os.open(json_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        # os.write may write less than asked; continue from where it stopped
+        while payload:
+            payload = payload[os.write(fd, payload):]
+    finally:
+        os.close(fd)
+
+
+def score_task(task):
+    """
+    Update dimension names and add scores for every model in a task, in place.
+    Returns (models processed, scores added, dimensions updated).
+    """
+    task_models = 0
+    task_scores = 0
+    task_dimensions = 0
+    
+    # Process each model in the task
+    for model in task.get('models'):
+        task_models += 1
+        model_name = model.get('model_name')
+        
+        # Add scores to each section that exists and has rubrics
+        for section_key, section_label in SCORED_SECTIONS:
+            section = model.get(section_key)
+            if section is None or 'rubrics' not in section:
+                continue
+            rubrics = section['rubrics']
+            
+            # Update dimension names
+            updated = update_dimension_names(rubrics)
+            task_dimensions += updated
+            
+            # Calculate and add score
+            score = calculate_score_for_a_task(rubrics)
+            section['score'] = round(score, 2)
+            task_scores += 1
+            logger.debug("  %s: %s - Updated %d dimensions, added score: %.2f",
+                         model_name, section_label, updated, score)
+    
+    return task_models, task_scores, task_dimensions
+
+
+def _score_task_in_worker(task):
+    """
+    Worker-process entry point: score a task without sending it back.
+    Returns ((models, scores, dimensions updated), section patches), where each patch is
+    (model index, section key, score, [(rubric index, new dimension name), ...]).
+    """
+    section_patches = []
+    dimensions_updated = 0
+    models = task.get('models')
+    
+    for model_idx, model in enumerate(models):
+        for section_key, _ in SCORED_SECTIONS:
+            section = model.get(section_key)
+            if section is None or 'rubrics' not in section:
+                continue
+            rubrics = section['rubrics']
+            
+            renames = _dimension_renames(rubrics)
+            dimensions_updated += len(renames)
+            section_patches.append(
+                (model_idx, section_key, calculate_score_for_a_task(rubrics), renames))
+    
+    counts = (len(models), len(section_patches), dimensions_updated)
+    return counts, section_patches
+
+
+def _init_worker(data):
+    """
+    Pool initializer: keep the comparison data so workers can be sent index ranges.
+    """
+    global _worker_data
+    _worker_data = data
+
+
+def _score_shard_in_worker(shard):
+    """
+    Worker-process entry point: score tasks [start, stop) of the worker's data.
+    Returns the _score_task_in_worker result for each task in the shard.
+    """
+    start, stop = shard
+    return [_score_task_in_worker(task) for task in _worker_data[start:stop]]
+
+
+def _apply_worker_patches(task, section_patches):
+    """
+    Apply the section patches returned by _score_task_in_worker to a task, in place.
+    """
+    section_labels = dict(SCORED_SECTIONS)
+    models = task.get('models')
+    for model_idx, section_key, score, renames in section_patches:
+        model = models[model_idx]
+        section = model[section_key]
+        _apply_dimension_renames(section['rubrics'], renames)
+        section['score'] = round(score, 2)
+        # Logged here rather than in the worker, whose logging may not be configured
+        logger.debug("  %s: %s - Updated %d dimensions, added score: %.2f",
+                     model.get('model_name'), section_labels[section_key], len(renames), score)
+
+
+def build_score_patches(data):
+    """
+    Collect the scores of already-scored data into a small patch mapping of
+    {task_id: {model_name: {section: {"score": score}}}}.
+    Raises ValueError if a model name appears twice within a task, since its
+    patches could not be told apart.
+    """
+    patches = {}
+    for task in data:
+        task_id = task['metadata']['task_id']
+        task_patches = patches.setdefault(task_id, {})
+        for model in task.get('models'):
+            model_name = model.get('model_name')
+            model_patches = {}
+            for section_key, _ in SCORED_SECTIONS:
+                section = model.get(section_key)
+                if section is None or 'rubrics' not in section:
+                    continue
+                model_patches[section_key] = {'score': section['score']}
+            if not model_patches:
+                continue
+            if model_name in task_patches:
+                raise ValueError(f"duplicate model_name {model_name!r} in task {task_id}")
+            task_patches[model_name] = model_patches
+    return patches
+
+
+def apply_score_patches(data, patches):
+    """
+    Apply patches from build_score_patches to unscored comparison data in place.
+    Dimension names of patched sections are updated as well, since the mapping is fixed.
+    Returns the number of scores applied.
+    """
+    applied = 0
+    for task in data:
+        task_patches = patches.get(task['metadata']['task_id'])
+        if not task_patches:
+            continue
+        for model in task.get('models'):
+            model_patches = task_patches.get(model.get('model_name'))
+            if not model_patches:
+                continue
+            for section_key, section_patch in model_patches.items():
+                section = model.get(section_key)
+                if section is None:
+                    continue
+                update_dimension_names(section.get('rubrics', ()))
+                section.update(section_patch)
+                applied += 1
+    return applied
 
 
-def add_scores_to_comparison_data(json_file_path):
+def add_scores_to_comparison_data(json_file_path, workers=1, scores_path=None, compact=False):
     """
     Read comparison_data.json, add scores to each model's thinking_trace and model_resp,
     update dimension names, and save the updated data back to the file.
+    With workers > 1, tasks are scored in that many separate processes.
+    With scores_path, only the score patches are written there and
+    json_file_path is left untouched (see apply_scores_to_comparison_data).
+    With compact, the output is written without indentation.
     """
     # Read the JSON file
     print(f"Reading {json_file_path}...")
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_comparison_data(json_file_path)
     
     total_tasks = len(data)
     total_models = 0
     scores_added = 0
     dimensions_updated = 0
     
-    # Process each task
-    for task_idx, task in enumerate(data):
-        print(f"\nProcessing task {task_idx + 1}/{total_tasks} (ID: {task['metadata']['task_id']})")
-        
-        # Process each model in the task
-        for model in task.get('models'):
-            total_models += 1
-            model_name = model.get('model_name')
-            print(f"  Processing model: {model_name}")
-            
-            # Add score to thinking_trace if it exists and has rubrics
-            if 'thinking_trace' in model and 'rubrics' in model['thinking_trace']:
-                rubrics = model['thinking_trace']['rubrics']
-                
-                # Update dimension names
-                updated = update_dimension_names(rubrics)
-                dimensions_updated += updated
-                
-                # Calculate and add score
-                score = calculate_score_for_a_task(rubrics)
-                model['thinking_trace']['score'] = round(score, 2)
-                scores_added += 1
-                print(f"    Thinking trace - Updated {updated} dimensions, added score: {score:.2f}")
-            
-            # Add score to model_resp if it exists and has rubrics
-            if 'model_resp' in model and 'rubrics' in model['model_resp']:
-                rubrics = model['model_resp']['rubrics']
-                
-                # Update dimension names
-                updated = update_dimension_names(rubrics)
-                dimensions_updated += updated
-                
-                # Calculate and add score
-                score = calculate_score_for_a_task(rubrics)
-                model['model_resp']['score'] = round(score, 2)
-                scores_added += 1
-                print(f"    Model response - Updated {updated} dimensions, added score: {score:.2f}")
+    # Process each task, optionally sharded across worker processes
+    if workers > 1:
+        shard_size = max(1, len(data) // (workers * 4))
+        shards = [(start, min(start + shard_size, total_tasks))
+                  for start in range(0, total_tasks, shard_size)]
+        # Forked workers inherit data through the initializer, so only index
+        # ranges and small patches cross process boundaries. Where fork is
+        # unavailable, data is pickled once to every worker instead.
+        if 'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        else:
+            mp_context = None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                                 initializer=_init_worker, initargs=(data,)) as executor:
+            results = [result for shard_results in executor.map(_score_shard_in_worker, shards)
+                       for result in shard_results]
+        task_counts = []
+        for task, (counts, section_patches) in zip(data, results):
+            _apply_worker_patches(task, section_patches)
+            task_counts.append(counts)
+    else:
+        task_counts = [score_task(task) for task in data]
+    
+    for task_idx, (task, counts) in enumerate(zip(data, task_counts)):
+        task_models, task_scores, task_dimensions = counts
+        logger.info("Task %d/%d (ID: %s): %d models, %d scores added, %d dimensions updated",
+                    task_idx + 1, total_tasks, task['metadata']['task_id'],
+                    task_models, task_scores, task_dimensions)
+        total_models += task_models
+        scores_added += task_scores
+        dimensions_updated += task_dimensions
+    
+    if scores_path is not None:
+        # Save only the scores, leaving the input file as it is; the dimension
+        # renames are redone by apply_score_patches, so they are not reported
+        print(f"\nSaving scores to {scores_path}...")
+        save_comparison_data(build_score_patches(data), scores_path, compact=compact)
+        _print_summary(f"Wrote {scores_added} scores to {scores_path}",
+                       total_tasks, total_models, scores_added)
+    else:
+        # Save the updated data back to the file
+        print(f"\nSaving updated data to {json_file_path}...")
+        save_comparison_data(data, json_file_path, compact=compact)
+        _print_summary(f"Successfully updated {json_file_path}",
+                       total_tasks, total_models, scores_added, dimensions_updated)
+
+
+def apply_scores_to_comparison_data(json_file_path, scores_path, compact=False):
+    """
+    Read comparison_data.json and a scores file written by
+    add_scores_to_comparison_data(scores_path=...), apply the scores with
+    apply_score_patches, and save the updated data back to the file.
+    """
+    print(f"Reading {json_file_path} and {scores_path}...")
+    data = load_comparison_data(json_file_path)
+    patches = load_comparison_data(scores_path)
     
-    # Save the updated data back to the file
-    print(f"\n\nSaving updated data to {json_file_path}...")
-    with open(json_file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    scores_applied = apply_score_patches(data, patches)
     
+    print(f"\nSaving updated data to {json_file_path}...")
+    save_comparison_data(data, json_file_path, compact=compact)
+    print(f"\nApplied {scores_applied} scores from {scores_path} to {json_file_path}")
+
+
+def stream_scores_to_comparison_data(json_file_path, compact=False):
+    """
+    Streaming variant of add_scores_to_comparison_data for files too large to hold in memory.
+    Tasks are read one at a time with ijson, scored, and written to a temporary file
+    that replaces json_file_path once complete. The output is identical.
+    """
+    if ijson is None:
+        raise ImportError("streaming comparison data requires the ijson package")
+    
+    json_file_path = Path(json_file_path)
+    tmp_file_path = json_file_path.with_name(json_file_path.name + '.tmp')
+    total_tasks = 0
+    total_models = 0
+    scores_added = 0
+    dimensions_updated = 0
+    
+    print(f"Streaming {json_file_path}...")
+    try:
+        with open(json_file_path, 'rb') as src, open(tmp_file_path, 'wb') as out:
+            for task in ijson.items(src, 'item', use_float=True):
+                task_models, task_scores, task_dimensions = score_task(task)
+                total_tasks += 1
+                logger.info("Task %d (ID: %s): %d models, %d scores added, %d dimensions updated",
+                            total_tasks, task['metadata']['task_id'],
+                            task_models, task_scores, task_dimensions)
+                total_models += task_models
+                scores_added += task_scores
+                dimensions_updated += task_dimensions
+                
+                encoded = encode_comparison_data(task, compact=compact, trailing_newline=False)
+                if compact:
+                    out.write(b'[' if total_tasks == 1 else b',')
+                else:
+                    # Nest each task one level inside the top-level array; JSON strings
+                    # never contain raw newlines, so re-indenting line by line is safe
+                    out.write(b'[\n  ' if total_tasks == 1 else b',\n  ')
+                    encoded = encoded.replace(b'\n', b'\n  ')
+                out.write(encoded)
+            if not total_tasks:
+                # Nothing was streamed, so the array was never opened
+                out.write(b'[]\n')
+            else:
+                out.write(b']\n' if compact else b'\n]\n')
+        os.replace(tmp_file_path, json_file_path)
+    except BaseException:
+        # Don't leave a partial file next to the data, e.g. on bad input or Ctrl-C
+        tmp_file_path.unlink(missing_ok=True)
+        raise
+    
+    _print_summary(f"Successfully updated {json_file_path}",
+                   total_tasks, total_models, scores_added, dimensions_updated)
+
+
+def _print_summary(result, total_tasks, total_models, scores_added, dimensions_updated=None):
+    """
+    Print the end-of-run totals, followed by the result line.
+    The dimensions line is left out when dimensions_updated is None.
+    """
     print(f"\n{'='*60}")
     print(f"Summary:")
     print(f"  Total tasks processed: {total_tasks}")
     print(f"  Total models processed: {total_models}")
     print(f"  Total scores added: {scores_added}")
-    print(f"  Total dimensions updated: {dimensions_updated}")
+    if dimensions_updated is not None:
+        print(f"  Total dimensions updated: {dimensions_updated}")
     print(f"{'='*60}")
-    print(f"\nSuccessfully updated {json_file_path}")
+    print(f"\n{result}")
 
 
 if __name__ == "__main__":
-    # Path to the comparison_data.json file
-    json_file = Path(__file__).parent / "comparison_data.json"
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "json_file", nargs="?", type=Path,
+        default=Path(__file__).parent / "comparison_data.json",
+        help="comparison data file to update in place (default: %(default)s)")
+    parser.add_argument(
+        "-v", "--verbose", action="count", default=0,
+        help="log one line per task; repeat to also log every scored section")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=1,
+        help="number of processes to score tasks in (default: %(default)s, no pool); "
+             "without fork (e.g. Windows) every worker receives a pickled copy of the data")
+    parser.add_argument(
+        "--scores-out", type=Path,
+        help="write only the scores to this file instead of rewriting json_file")
+    parser.add_argument(
+        "--apply-scores", type=Path, metavar="SCORES_FILE",
+        help="apply a file written by --scores-out to json_file instead of scoring it")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="score one task at a time with ijson instead of loading the whole file")
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="write JSON without indentation (smaller, faster, but not diff-friendly)")
+    args = parser.parse_args()
+    if args.stream and (args.workers > 1 or args.scores_out is not None):
+        parser.error("--stream cannot be combined with --workers or --scores-out")
+    if args.apply_scores is not None and (args.stream or args.workers > 1
+                                          or args.scores_out is not None):
+        parser.error("--apply-scores cannot be combined with --stream, --workers or --scores-out")
+    
+    logging.basicConfig(
+        level=(logging.WARNING, logging.INFO, logging.DEBUG)[min(args.verbose, 2)],
+        format="%(message)s")
     
     # Add scores to the data
-    add_scores_to_comparison_data(json_file)
+    if args.apply_scores is not None:
+        apply_scores_to_comparison_data(args.json_file, args.apply_scores, compact=args.compact)
+    elif args.stream:
+        stream_scores_to_comparison_data(args.json_file, compact=args.compact)
+    else:
+        add_scores_to_comparison_data(args.json_file, workers=args.workers,
+                                      scores_path=args.scores_out, compact=args.compact)
 